@@ -1,12 +1,42 @@
 import argparse
+import functools
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple
 
 import numpy as np
 import pandas as pd
 import scipy.sparse as sp
 
+try:
+    from numba import njit, prange, set_num_threads
+
+    NUMBA_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional accelerator
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        def wrap(fn):
+            return fn
+
+        return wrap
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional accelerator
+    orjson = None
+
+
+# Gaussian noise values drawn per generator call (32 MB of float64); whole
+# time steps are drawn at a time, at least one.
+NOISE_BLOCK_ELEMS = 1 << 22
+# Cells per W product in the NumPy step; keeps each h tile cache resident.
+CELL_BLOCK = 256
+# Latent rows converted to counts at a time in run_sample.
+COUNT_CHUNK_ROWS = 10000
+
 
 def build_gene_names() -> Tuple[List[str], Dict[str, List[int]]]:
     names = []
@@ -40,93 +70,113 @@ def build_grn(
     lineage_tfs_per: int,
 ) -> Dict[str, np.ndarray]:
     n_genes = len(gene_names)
-    rows = []
-    cols = []
-    data = []
-    edge_list = []
-
-    def add_edge(src: int, dst: int, weight: float, label: str) -> None:
-        rows.append(dst)
-        cols.append(src)
-        data.append(weight)
-        edge_list.append(
-            {
-                "source": gene_names[src],
-                "target": gene_names[dst],
-                "weight": float(weight),
-                "type": label,
-            }
+    src_blocks: List[np.ndarray] = []
+    dst_blocks: List[np.ndarray] = []
+    weight_blocks: List[np.ndarray] = []
+    label_blocks: List[np.ndarray] = []
+
+    def add_edges(src, dst, weight, label) -> None:
+        src = np.asarray(src, dtype=np.int64).ravel()
+        dst = np.asarray(dst, dtype=np.int64).ravel()
+        src_blocks.append(src)
+        dst_blocks.append(dst)
+        weight_blocks.append(
+            np.broadcast_to(np.asarray(weight, dtype=np.float64).ravel(), src.shape)
+        )
+        label_blocks.append(
+            np.broadcast_to(np.asarray(label, dtype=object).ravel(), src.shape)
         )
 
-    prog = groups["prog"]
+    prog = np.asarray(groups["prog"])
     lineage = groups["lineage"]
     ligands = groups["ligand"]
-    receptors = groups["receptor"]
+    receptors = np.asarray(groups["receptor"])
     targets = groups["target"]
+    n_prog = len(prog)
+
+    # Each progenitor TF gets its self edge followed by edges from the others.
+    others = np.tile(prog, (n_prog, 1))[~np.eye(n_prog, dtype=bool)]
+    others = others.reshape(n_prog, n_prog - 1)
+    mutual = 0.35 + 0.1 * rng.random(others.shape)
+    add_edges(
+        np.column_stack([prog, others]),
+        np.repeat(prog, n_prog),
+        np.column_stack([np.full(n_prog, 0.2), mutual]),
+        np.column_stack(
+            [
+                np.full(n_prog, "prog_self", dtype=object),
+                np.full(others.shape, "prog_mutual", dtype=object),
+            ]
+        ),
+    )
 
-    for i in prog:
-        add_edge(i, i, 0.2, "prog_self")
-        for j in prog:
-            if i == j:
-                continue
-            add_edge(j, i, 0.35 + 0.1 * rng.random(), "prog_mutual")
-
-    for lin_idx in lineage:
-        for prog_idx in prog:
-            add_edge(prog_idx, lin_idx, 0.15, "prog_to_lineage")
+    add_edges(
+        np.tile(prog, len(lineage)),
+        np.repeat(lineage, n_prog),
+        0.15,
+        "prog_to_lineage",
+    )
 
+    lineage_blocked = np.asarray(lineage[: n_lineages * lineage_tfs_per])
+    block_of = np.arange(len(lineage_blocked)) // lineage_tfs_per
     for lin_block in range(n_lineages):
-        tf_indices = lineage[
-            lin_block * lineage_tfs_per : (lin_block + 1) * lineage_tfs_per
-        ]
-        for tf in tf_indices:
-            add_edge(tf, tf, 0.6, "lineage_self")
+        tf_indices = lineage_blocked[block_of == lin_block]
+        add_edges(tf_indices, tf_indices, 0.6, "lineage_self")
         if len(tf_indices) == 2:
-            add_edge(tf_indices[0], tf_indices[1], 0.4, "lineage_partner")
-            add_edge(tf_indices[1], tf_indices[0], 0.4, "lineage_partner")
-
-        for tf in tf_indices:
-            for other_block in range(n_lineages):
-                if other_block == lin_block:
-                    continue
-                other_tfs = lineage[
-                    other_block * lineage_tfs_per : (other_block + 1) * lineage_tfs_per
-                ]
-                for other_tf in other_tfs:
-                    add_edge(other_tf, tf, -0.5, "lineage_inhibit")
-
-        for tf in tf_indices:
-            for prog_idx in prog:
-                add_edge(tf, prog_idx, -0.3, "lineage_repress_prog")
-
-    target_splits = np.array_split(targets, n_lineages)
-    for lin_block, target_subset in enumerate(target_splits):
-        tf_indices = lineage[
-            lin_block * lineage_tfs_per : (lin_block + 1) * lineage_tfs_per
-        ]
-        for tf in tf_indices:
-            for tgt in target_subset:
-                add_edge(tf, tgt, 0.7, "lineage_to_target")
+            add_edges(tf_indices, tf_indices[::-1], 0.4, "lineage_partner")
+
+        other_tfs = lineage_blocked[block_of != lin_block]
+        add_edges(
+            np.tile(other_tfs, len(tf_indices)),
+            np.repeat(tf_indices, len(other_tfs)),
+            -0.5,
+            "lineage_inhibit",
+        )
+        add_edges(
+            np.repeat(tf_indices, n_prog),
+            np.tile(prog, len(tf_indices)),
+            -0.3,
+            "lineage_repress_prog",
+        )
 
-    ligand_splits = np.array_split(ligands, n_lineages)
-    for lin_block, ligand_subset in enumerate(ligand_splits):
-        tf_indices = lineage[
-            lin_block * lineage_tfs_per : (lin_block + 1) * lineage_tfs_per
-        ]
-        for tf in tf_indices:
-            for lig in ligand_subset:
-                add_edge(tf, lig, 0.6, "lineage_to_ligand")
+    for splits, weight, label in (
+        (np.array_split(targets, n_lineages), 0.7, "lineage_to_target"),
+        (np.array_split(ligands, n_lineages), 0.6, "lineage_to_ligand"),
+    ):
+        for lin_block, subset in enumerate(splits):
+            tf_indices = lineage_blocked[block_of == lin_block]
+            add_edges(
+                np.repeat(tf_indices, len(subset)),
+                np.tile(subset, len(tf_indices)),
+                weight,
+                label,
+            )
 
-    for prog_idx in prog:
-        for rec in receptors:
-            add_edge(prog_idx, rec, 0.2, "prog_to_receptor")
+    add_edges(
+        np.repeat(prog, len(receptors)),
+        np.tile(receptors, n_prog),
+        0.2,
+        "prog_to_receptor",
+    )
 
+    # Scalar draws keep the random stream (and synth_grn.json) unchanged.
+    random_src = []
+    random_dst = []
+    random_weight = []
     for _ in range(200):
         src = rng.integers(0, n_genes)
         dst = rng.integers(0, n_genes)
         if src == dst:
             continue
-        add_edge(src, dst, rng.uniform(-0.05, 0.05), "random")
+        random_src.append(src)
+        random_dst.append(dst)
+        random_weight.append(rng.uniform(-0.05, 0.05))
+    add_edges(random_src, random_dst, random_weight, "random")
+
+    cols = np.concatenate(src_blocks)
+    rows = np.concatenate(dst_blocks)
+    data = np.concatenate(weight_blocks)
+    labels = np.concatenate(label_blocks)
 
     W = sp.csr_matrix((data, (rows, cols)), shape=(n_genes, n_genes))
 
@@ -163,10 +213,29 @@ def build_grn(
         "bias": bias,
         "decay": decay,
         "noise": noise,
-        "edges": edge_list,
+        "edge_src": cols,
+        "edge_dst": rows,
+        "edge_weight": data,
+        "edge_type": labels,
     }
 
 
+def edge_records(
+    grn: Dict[str, np.ndarray], gene_names: List[str]
+) -> List[Dict[str, object]]:
+    """Expand the edge arrays of ``build_grn`` into JSON records."""
+    names = np.asarray(gene_names, dtype=object)
+    return [
+        {"source": src, "target": dst, "weight": weight, "type": label}
+        for src, dst, weight, label in zip(
+            names[grn["edge_src"]].tolist(),
+            names[grn["edge_dst"]].tolist(),
+            grn["edge_weight"].tolist(),
+            grn["edge_type"].tolist(),
+        )
+    ]
+
+
 def build_ligand_receptor_effects(
     gene_names: List[str],
     groups: Dict[str, List[int]],
@@ -200,11 +269,132 @@ def build_ligand_receptor_effects(
     return B, pair_map
 
 
-def hill(x: np.ndarray, k: float, n: float) -> np.ndarray:
-    x_pos = np.maximum(x, 0.0)
-    x_pow = np.power(x_pos, n)
-    k_pow = k**n
-    return x_pow / (k_pow + x_pow + 1e-8)
+def hill(
+    x: np.ndarray,
+    k_pow: float,
+    n: float,
+    out: np.ndarray = None,
+    scratch: np.ndarray = None,
+) -> np.ndarray:
+    """Hill activation; ``k_pow`` is ``k**n`` with the 1e-8 guard folded in.
+
+    With ``out`` and ``scratch`` (same shape as ``x``) no temporaries are made.
+    """
+    x_pow = np.maximum(x, 0.0, out=out)
+    if n == 2.0:
+        np.multiply(x_pow, x_pow, out=x_pow)
+    else:
+        np.power(x_pow, n, out=x_pow)
+    denom = np.add(x_pow, k_pow, out=scratch)
+    return np.divide(x_pow, denom, out=x_pow)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _ligand_mean(
+    x: np.ndarray,
+    lig_idx: np.ndarray,
+    neighbor_idx: np.ndarray,
+    neighbor_mix: float,
+    out: np.ndarray,
+) -> None:
+    n_cells = x.shape[0]
+    n_lig = lig_idx.shape[0]
+    k = neighbor_idx.shape[1]
+
+    global_lig = np.empty(n_lig, dtype=np.float64)
+    for j in prange(n_lig):
+        acc = 0.0
+        for c in range(n_cells):
+            acc += max(x[c, lig_idx[j]], 0.0)
+        global_lig[j] = acc / n_cells
+
+    for c in prange(n_cells):
+        for j in range(n_lig):
+            if k == 0:
+                out[c, j] = global_lig[j]
+            else:
+                acc = 0.0
+                for m in range(k):
+                    acc += max(x[neighbor_idx[c, m], lig_idx[j]], 0.0)
+                out[c, j] = (
+                    neighbor_mix * (acc / k) + (1.0 - neighbor_mix) * global_lig[j]
+                )
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _step(
+    x: np.ndarray,
+    W_data: np.ndarray,
+    W_indices: np.ndarray,
+    W_indptr: np.ndarray,
+    bias: np.ndarray,
+    decay: np.ndarray,
+    noise_scale: np.ndarray,
+    lig_idx: np.ndarray,
+    rec_idx: np.ndarray,
+    effect_rows: np.ndarray,
+    ligand_effects_T: np.ndarray,
+    morphogen: np.ndarray,
+    ligand_mean: np.ndarray,
+    k_pow: float,
+    hill_n: float,
+    dt: float,
+    x_max: float,
+    rnd_normals: np.ndarray,
+) -> None:
+    n_cells, n_genes = x.shape
+    n_pairs = rec_idx.shape[0]
+    n_effect = effect_rows.shape[0]
+    square = hill_n == 2.0
+    zero = np.float32(0.0)
+
+    for c in prange(n_cells):
+        h = np.empty(n_genes, dtype=np.float32)
+        for g in range(n_genes):
+            x_pos = max(x[c, g], zero)
+            if square:
+                x_pow = x_pos * x_pos
+            else:
+                x_pow = x_pos**hill_n
+            h[g] = x_pow / (k_pow + x_pow)
+
+        deriv = np.empty(n_genes, dtype=np.float32)
+        for g in range(n_genes):
+            acc = zero
+            for k in range(W_indptr[g], W_indptr[g + 1]):
+                acc += W_data[k] * h[W_indices[k]]
+            deriv[g] = acc
+
+        for p in range(n_pairs):
+            signal = h[rec_idx[p]] * ligand_mean[c, p]
+            if signal != 0.0:
+                for r in range(n_effect):
+                    deriv[effect_rows[r]] += signal * ligand_effects_T[p, r]
+
+        for g in range(n_genes):
+            d = deriv[g] + bias[g] - decay[g] * x[c, g] + morphogen[g]
+            eps = np.float32(rnd_normals[c, g])
+            v = x[c, g] + dt * d + noise_scale[g] * eps
+            x[c, g] = min(max(v, zero), x_max)
+
+
+def sample_neighbors(rng: np.random.Generator, n_cells: int, k: int) -> np.ndarray:
+    """Pick ``k`` distinct neighbours per cell, excluding the cell itself.
+
+    Runs Floyd's subset sampler for all cells at once: ``k`` vectorised
+    draws, so cost grows with ``n_cells * k`` rather than ``n_cells**2``.
+    This consumes a different stream than per-cell ``rng.choice``, so seeded
+    ``--neighbor-mode random`` runs differ from the old loop.
+    """
+    n_candidates = n_cells - 1
+    neighbor_idx = np.empty((n_cells, k), dtype=np.int64)
+    for col, j in enumerate(range(n_candidates - k, n_candidates)):
+        picks = rng.integers(0, j + 1, size=n_cells)
+        taken = (neighbor_idx[:, :col] == picks[:, None]).any(axis=1)
+        neighbor_idx[:, col] = np.where(taken, j, picks)
+    # Shift indices at or past the cell's own row to skip it.
+    neighbor_idx += neighbor_idx >= np.arange(n_cells)[:, None]
+    return neighbor_idx
 
 
 def simulate_sample(
@@ -225,7 +415,8 @@ def simulate_sample(
     neighbor_mix: float,
 ) -> np.ndarray:
     n_genes = len(grn["bias"])
-    W = grn["W"].transpose().toarray()
+    # The step runs in float32 end to end; float64 operands would upcast it.
+    W = grn["W"].astype(np.float32)
     bias = grn["bias"]
     decay = grn["decay"]
     noise = grn["noise"]
@@ -260,6 +451,20 @@ def simulate_sample(
     snapshot_idx = 1
     lig_idx = groups["ligand"]
     rec_idx = groups["receptor"]
+    k_pow = np.float32(hill_k**hill_n + 1e-8)
+    hill_n = np.float32(hill_n)
+    dt = np.float32(dt)
+    # Per-gene std of the Euler-Maruyama increment, noise * sqrt(dt).
+    noise_scale = (noise * np.sqrt(dt)).astype(np.float32)
+    x_max = np.float32(x_max)
+
+    step_elems = max(1, n_cells * n_genes)
+    noise_chunk = max(1, min(total_steps, NOISE_BLOCK_ELEMS // step_elems))
+    noise_buf = np.empty((noise_chunk, n_cells, n_genes), dtype=np.float64)
+
+    # Only the lineage TF rows of ligand_effects are non-zero; project onto those.
+    effect_rows = np.flatnonzero(ligand_effects.any(axis=1))
+    ligand_effects_small = ligand_effects[effect_rows]
 
     neighbor_idx = None
     if neighbor_mode == "random":
@@ -267,30 +472,92 @@ def simulate_sample(
             neighbor_idx = None
         else:
             k = min(neighbor_k, n_cells - 1)
-            neighbor_idx = np.empty((n_cells, k), dtype=np.int64)
-            for i in range(n_cells):
-                choices = rng.choice(n_cells - 1, size=k, replace=False)
-                choices = np.where(choices >= i, choices + 1, choices)
-                neighbor_idx[i] = choices
+            neighbor_idx = sample_neighbors(rng, n_cells, k)
 
-    for step in range(total_steps):
-        h = hill(x, hill_k, hill_n)
-        f = h @ W + bias - decay * x
+    if NUMBA_AVAILABLE:
+        lig_idx_arr = np.asarray(lig_idx, dtype=np.int64)
+        rec_idx_arr = np.asarray(rec_idx, dtype=np.int64)
+        ligand_effects_T = np.ascontiguousarray(ligand_effects_small.T)
+        if neighbor_idx is None:
+            neighbor_arr = np.empty((n_cells, 0), dtype=np.int64)
+        else:
+            neighbor_arr = neighbor_idx
+        ligand_mean = np.empty((n_cells, len(lig_idx)), dtype=np.float32)
+
+        for step in range(total_steps):
+            _ligand_mean(x, lig_idx_arr, neighbor_arr, neighbor_mix, ligand_mean)
+            buf_idx = step % noise_chunk
+            if buf_idx == 0:
+                # Never draw past the last step so the stream stays aligned.
+                rng.standard_normal(out=noise_buf[: total_steps - step])
+            _step(
+                x,
+                W.data,
+                W.indices,
+                W.indptr,
+                bias,
+                decay,
+                noise_scale,
+                lig_idx_arr,
+                rec_idx_arr,
+                effect_rows,
+                ligand_effects_T,
+                morphogen,
+                ligand_mean,
+                k_pow,
+                hill_n,
+                dt,
+                x_max,
+                noise_buf[buf_idx],
+            )
+
+            if (step + 1) % steps_per_tp == 0:
+                snapshots[:, snapshot_idx, :] = x
+                snapshot_idx += 1
 
+        return snapshots
+
+    h = np.empty_like(x)
+    hill_scratch = np.empty_like(x)
+    deriv = np.empty_like(x)
+    x_lig = np.empty((n_cells, len(lig_idx)), dtype=x.dtype)
+    receptor_act = np.empty((n_cells, len(rec_idx)), dtype=x.dtype)
+    receptor_scratch = np.empty_like(receptor_act)
+    g_signal = np.empty((n_cells, len(effect_rows)), dtype=x.dtype)
+
+    for step in range(total_steps):
+        hill(x, k_pow, hill_n, out=h, scratch=hill_scratch)
+        for start in range(0, n_cells, CELL_BLOCK):
+            stop = start + CELL_BLOCK
+            deriv[start:stop] = W.dot(h[start:stop].T).T
+        deriv += bias
+        deriv += morphogen
+        np.multiply(decay, x, out=h)
+        deriv -= h
+
+        np.take(x, lig_idx, axis=1, out=x_lig)
+        np.maximum(x_lig, 0.0, out=x_lig)
         if neighbor_idx is None:
-            ligand_mean = np.maximum(x[:, lig_idx], 0.0).mean(axis=0)
+            ligand_mean = x_lig.mean(axis=0)
         else:
-            neighbor_lig = np.maximum(x[neighbor_idx][:, :, lig_idx], 0.0).mean(axis=1)
-            global_lig = np.maximum(x[:, lig_idx], 0.0).mean(axis=0)
+            # Gather neighbours from the ligand columns only, not the full state.
+            neighbor_lig = x_lig[neighbor_idx].mean(axis=1)
+            global_lig = x_lig.mean(axis=0)
             ligand_mean = neighbor_mix * neighbor_lig + (1.0 - neighbor_mix) * global_lig
-        receptor_act = hill(x[:, rec_idx], hill_k, hill_n)
-        signal = receptor_act * ligand_mean
-        g_signal = signal.dot(ligand_effects.T)
-
-        deriv = f + g_signal + morphogen
-        noise_term = rng.normal(0.0, noise, size=x.shape) * np.sqrt(dt)
-        x = x + dt * deriv + noise_term
-        x = np.clip(x, 0.0, x_max)
+        np.take(x, rec_idx, axis=1, out=receptor_act)
+        hill(receptor_act, k_pow, hill_n, out=receptor_act, scratch=receptor_scratch)
+        np.multiply(receptor_act, ligand_mean, out=receptor_act, casting="same_kind")
+        np.dot(receptor_act, ligand_effects_small.T, out=g_signal)
+        deriv[:, effect_rows] += g_signal
+
+        buf_idx = step % noise_chunk
+        if buf_idx == 0:
+            rng.standard_normal(out=noise_buf[: total_steps - step])
+        np.multiply(noise_buf[buf_idx], noise_scale, out=h, casting="same_kind")
+        deriv *= dt
+        x += deriv
+        x += h
+        np.clip(x, 0.0, x_max, out=x)
 
         if (step + 1) % steps_per_tp == 0:
             snapshots[:, snapshot_idx, :] = x
@@ -307,17 +574,52 @@ def latent_to_counts(
     dropout_scale: float,
 ) -> np.ndarray:
     mu = np.log1p(np.exp(x))
-    shape = dispersion
-    scale = mu / dispersion
-    lam = rng.gamma(shape, scale)
-    counts = rng.poisson(lam).astype(np.int32)
+    # Gamma(dispersion, mu / dispersion)-Poisson is NB(dispersion, p).
+    p = dispersion / (dispersion + mu)
+    counts = rng.negative_binomial(dispersion, p).astype(np.int32)
 
     drop_prob = 1.0 / (1.0 + np.exp((mu - dropout_mid) / dropout_scale))
-    drop_mask = rng.random(mu.shape) < drop_prob
-    counts[drop_mask] = 0
+    keep = rng.random(mu.shape, dtype=np.float32) >= drop_prob
+    counts *= keep
     return counts
 
 
+def stack_csr_rows(blocks: List[sp.csr_matrix], n_cols: int) -> sp.csr_matrix:
+    """Row-stack CSR blocks into one preallocated CSR, emptying ``blocks``.
+
+    Each block is released once copied, so peak memory stays near one copy
+    of the counts instead of the two that ``sp.vstack`` needs.
+    """
+    n_rows = sum(block.shape[0] for block in blocks)
+    nnz = sum(block.nnz for block in blocks)
+    index_dtype = np.int32 if max(nnz, n_cols) < np.iinfo(np.int32).max else np.int64
+    data = np.empty(nnz, dtype=blocks[0].dtype if blocks else np.int32)
+    indices = np.empty(nnz, dtype=index_dtype)
+    indptr = np.empty(n_rows + 1, dtype=index_dtype)
+    indptr[0] = 0
+
+    row = 0
+    pos = 0
+    blocks.reverse()
+    while blocks:
+        block = blocks.pop()
+        block_rows = block.shape[0]
+        data[pos : pos + block.nnz] = block.data
+        indices[pos : pos + block.nnz] = block.indices
+        # Offset in the output index dtype; block.indptr may be int32.
+        np.add(
+            block.indptr[1:],
+            pos,
+            out=indptr[row + 1 : row + 1 + block_rows],
+            dtype=index_dtype,
+        )
+        row += block_rows
+        pos += block.nnz
+        del block
+
+    return sp.csr_matrix((data, indices, indptr), shape=(n_rows, n_cols))
+
+
 def assign_lineage(
     x: np.ndarray,
     lineage_indices: List[int],
@@ -325,21 +627,100 @@ def assign_lineage(
     lineage_tfs_per: int,
     threshold: float,
 ) -> Tuple[np.ndarray, np.ndarray]:
-    scores = np.zeros((x.shape[0], n_lineages), dtype=np.float32)
-    for lin_idx in range(n_lineages):
-        tf_indices = lineage_indices[
-            lin_idx * lineage_tfs_per : (lin_idx + 1) * lineage_tfs_per
-        ]
-        scores[:, lin_idx] = np.mean(x[:, tf_indices], axis=1)
+    # Lineage TFs are laid out in consecutive blocks of lineage_tfs_per.
+    lineage_tfs = lineage_indices[: n_lineages * lineage_tfs_per]
+    scores = (
+        x[:, lineage_tfs]
+        .reshape(x.shape[0], n_lineages, lineage_tfs_per)
+        .mean(axis=2, dtype=np.float32)
+    )
 
     max_scores = scores.max(axis=1)
     lineage_id = np.argmax(scores, axis=1) + 1
     lineage_id[max_scores < threshold] = 0
 
-    exp_scores = np.exp(scores - scores.max(axis=1, keepdims=True))
-    probs = exp_scores / exp_scores.sum(axis=1, keepdims=True)
+    # Stable softmax, shifted by the row max already computed above.
+    probs = scores - max_scores[:, None]
+    np.exp(probs, out=probs)
+    probs /= probs.sum(axis=1, keepdims=True)
+
+    return lineage_id.astype(np.int32), probs.astype(np.float32, copy=False)
+
+
+def _init_sample_worker() -> None:
+    """Run Numba kernels single-threaded; the pool already uses every core."""
+    if NUMBA_AVAILABLE:
+        set_num_threads(1)
+
+
+def run_sample(
+    rng: np.random.Generator,
+    n_cells: int,
+    timepoints: np.ndarray,
+    steps_per_tp: int,
+    grn: Dict[str, np.ndarray],
+    ligand_effects: np.ndarray,
+    groups: Dict[str, List[int]],
+    dispersion: np.ndarray,
+    n_lineages: int,
+    lineage_tfs_per: int,
+    args: argparse.Namespace,
+) -> Tuple[sp.csr_matrix, np.ndarray, np.ndarray]:
+    """Simulate one sample; returns its counts, lineage ids and fate probabilities.
 
-    return lineage_id.astype(np.int32), probs.astype(np.float32)
+    Samples share no state, so this runs unchanged in a worker process.
+    """
+    n_genes = len(grn["bias"])
+    morphogen = np.zeros(n_genes, dtype=np.float32)
+    lineage_bias = rng.dirichlet(alpha=np.ones(n_lineages))
+    for lin_idx in range(n_lineages):
+        tf_indices = groups["lineage"][
+            lin_idx * lineage_tfs_per : (lin_idx + 1) * lineage_tfs_per
+        ]
+        morphogen[tf_indices] = args.morphogen_scale * lineage_bias[lin_idx]
+
+    snapshots = simulate_sample(
+        rng=rng,
+        n_cells=n_cells,
+        timepoints=timepoints,
+        dt=args.dt,
+        steps_per_tp=steps_per_tp,
+        grn=grn,
+        ligand_effects=ligand_effects,
+        groups=groups,
+        morphogen=morphogen,
+        x_max=args.x_max,
+        hill_k=args.hill_k,
+        hill_n=args.hill_n,
+        neighbor_mode=args.neighbor_mode,
+        neighbor_k=args.neighbor_k,
+        neighbor_mix=args.neighbor_mix,
+    )
+
+    snapshot_flat = snapshots.reshape(n_cells * len(timepoints), n_genes)
+    lineage_id, fate_probs = assign_lineage(
+        snapshot_flat,
+        groups["lineage"],
+        n_lineages,
+        lineage_tfs_per,
+        args.lineage_threshold,
+    )
+
+    # Sparsify counts chunk by chunk so no dense count matrix for the whole
+    # sample ever exists alongside the snapshots.
+    count_blocks = []
+    for start in range(0, snapshot_flat.shape[0], COUNT_CHUNK_ROWS):
+        counts = latent_to_counts(
+            rng=rng,
+            x=snapshot_flat[start : start + COUNT_CHUNK_ROWS],
+            dispersion=dispersion,
+            dropout_mid=args.dropout_mid,
+            dropout_scale=args.dropout_scale,
+        )
+        count_blocks.append(sp.csr_matrix(counts))
+    del snapshots, snapshot_flat
+
+    return stack_csr_rows(count_blocks, n_genes), lineage_id, fate_probs
 
 
 def main() -> None:
@@ -363,6 +744,12 @@ def main() -> None:
     parser.add_argument("--neighbor-mode", choices=["none", "random"], default="none")
     parser.add_argument("--neighbor-k", type=int, default=10)
     parser.add_argument("--neighbor-mix", type=float, default=1.0)
+    parser.add_argument(
+        "--n-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processes used to simulate samples in parallel.",
+    )
     args = parser.parse_args()
 
     rng = np.random.default_rng(args.seed)
@@ -404,73 +791,58 @@ def main() -> None:
     tgt_indices = []
     weights = []
 
+    # One child generator per sample keeps results independent of --n-workers.
+    sample_rngs = rng.spawn(args.n_samples)
+    sample_fn = functools.partial(
+        run_sample,
+        timepoints=timepoints,
+        steps_per_tp=steps_per_tp,
+        grn=grn,
+        ligand_effects=ligand_effects,
+        groups=groups,
+        dispersion=dispersion,
+        n_lineages=n_lineages,
+        lineage_tfs_per=lineage_tfs_per,
+        args=args,
+    )
+    if args.n_workers > 1 and args.n_samples > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(args.n_workers, args.n_samples),
+            initializer=_init_sample_worker,
+        ) as executor:
+            results = list(executor.map(sample_fn, sample_rngs, traj_per_sample))
+    else:
+        results = list(map(sample_fn, sample_rngs, traj_per_sample))
+
+    # Shared categories let pd.concat keep the obs columns categorical.
+    sample_names = [f"sample_{idx}" for idx in range(args.n_samples)]
+    cell_type_names = ["progenitor"] + [f"lin{idx}" for idx in range(1, n_lineages + 1)]
+    timepoint_codes = np.arange(args.n_timepoints, dtype=np.int32)
+    pseudotimes = timepoints.astype(np.float32)
+
     offset = 0
     for sample_idx in range(args.n_samples):
         n_cells = traj_per_sample[sample_idx]
-        morphogen = np.zeros(n_genes, dtype=np.float32)
-        lineage_bias = rng.dirichlet(alpha=np.ones(n_lineages))
-        for lin_idx in range(n_lineages):
-            tf_indices = groups["lineage"][
-                lin_idx * lineage_tfs_per : (lin_idx + 1) * lineage_tfs_per
-            ]
-            morphogen[tf_indices] = args.morphogen_scale * lineage_bias[lin_idx]
-
-        snapshots = simulate_sample(
-            rng=rng,
-            n_cells=n_cells,
-            timepoints=timepoints,
-            dt=args.dt,
-            steps_per_tp=steps_per_tp,
-            grn=grn,
-            ligand_effects=ligand_effects,
-            groups=groups,
-            morphogen=morphogen,
-            x_max=args.x_max,
-            hill_k=args.hill_k,
-            hill_n=args.hill_n,
-            neighbor_mode=args.neighbor_mode,
-            neighbor_k=args.neighbor_k,
-            neighbor_mix=args.neighbor_mix,
-        )
-
-        snapshot_flat = snapshots.reshape(n_cells * args.n_timepoints, n_genes)
-        counts = latent_to_counts(
-            rng=rng,
-            x=snapshot_flat,
-            dispersion=dispersion,
-            dropout_mid=args.dropout_mid,
-            dropout_scale=args.dropout_scale,
-        )
-        X_blocks.append(sp.csr_matrix(counts))
-
-        lineage_id, fate_probs = assign_lineage(
-            snapshot_flat,
-            groups["lineage"],
-            n_lineages,
-            lineage_tfs_per,
-            args.lineage_threshold,
-        )
+        counts, lineage_id, fate_probs = results[sample_idx]
+        X_blocks.append(counts)
         fate_blocks.append(fate_probs)
 
-        traj_ids = np.repeat(np.arange(n_cells), args.n_timepoints)
-        time_idx = np.tile(np.arange(args.n_timepoints), n_cells)
-        time_values = timepoints[time_idx]
-
-        cell_types = np.where(
-            lineage_id == 0,
-            "progenitor",
-            np.array([f"lin{idx}" for idx in lineage_id]),
-        )
+        time_idx = np.tile(timepoint_codes, n_cells)
 
         obs_records.append(
             pd.DataFrame(
                 {
-                    "sample": np.full_like(time_idx, f"sample_{sample_idx}", dtype=object),
-                    "timepoint": time_values,
+                    "sample": pd.Categorical.from_codes(
+                        np.full(time_idx.shape, sample_idx, dtype=np.int32),
+                        categories=sample_names,
+                    ),
+                    "timepoint": np.tile(timepoints, n_cells),
                     "timepoint_idx": time_idx,
-                    "pseudotime": time_values.astype(np.float32),
+                    "pseudotime": np.tile(pseudotimes, n_cells),
                     "lineage_id": lineage_id,
-                    "cell_type": cell_types,
+                    "cell_type": pd.Categorical.from_codes(
+                        lineage_id, categories=cell_type_names
+                    ),
                 }
             )
         )
@@ -485,7 +857,8 @@ def main() -> None:
 
         offset += cell_count
 
-    X = sp.vstack(X_blocks, format="csr")
+    del results
+    X = stack_csr_rows(X_blocks, n_genes)
     obs = pd.concat(obs_records, ignore_index=True)
     obs_names = [
         f"cell_{idx:07d}" for idx in range(obs.shape[0])
@@ -547,16 +920,17 @@ def main() -> None:
     adata_train.write_h5ad(train_path)
 
     grn_path = os.path.join(args.output_dir, "synthetic_grn.json")
-    with open(grn_path, "w", encoding="utf-8") as handle:
-        json.dump(
-            {
-                "gene_names": gene_names,
-                "edges": grn["edges"],
-                "ligand_receptor_pairs": pair_map,
-            },
-            handle,
-            indent=2,
-        )
+    grn_payload = {
+        "gene_names": gene_names,
+        "edges": edge_records(grn, gene_names),
+        "ligand_receptor_pairs": pair_map,
+    }
+    if orjson is not None:
+        with open(grn_path, "wb") as handle:
+            handle.write(orjson.dumps(grn_payload, option=orjson.OPT_INDENT_2))
+    else:
+        with open(grn_path, "w", encoding="utf-8") as handle:
+            json.dump(grn_payload, handle, indent=2)
 
     print(f"Wrote {full_path}")
     print(f"Wrote {train_path}")